@@ -39,7 +39,7 @@ def main():
         run_simulation(config_path=args.config, model_type=args.model)
         logging.info("Simulation completed successfully.")
     except Exception as e:
-        logging.error(f"Simulation failed: {e}")
+        logging.error("Simulation failed: %s", e)
         raise
 
 if __name__ == "__main__":
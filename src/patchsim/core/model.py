@@ -1,24 +1,102 @@
+import ast
+import math
+from collections.abc import MutableMapping
+
 import numpy as np
+from scipy import sparse
+
+# AST nodes allowed in rate expressions for complex-step differentiation
+_ARITHMETIC_NODES = (
+    ast.Expression, ast.Tuple, ast.Load, ast.Name, ast.Constant,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow,
+    ast.UnaryOp, ast.UAdd, ast.USub,
+)
+
+
+class CompartmentView(MutableMapping):
+    """
+    Dict-like view of one row of a shared (num_patches, C) compartment array.
+    """
+    def __init__(self, row, index):
+        """
+        :param row: 1-D array view holding this patch's compartment values.
+        :param index: Mapping from compartment name to column in row (shared between views).
+        """
+        self._row = row
+        self._index = index
+
+    def __getitem__(self, name):
+        return self._row[self._index[name]]
+
+    def __setitem__(self, name, value):
+        self._row[self._index[name]] = value
+
+    def __delitem__(self, name):
+        raise TypeError("Compartments cannot be removed from an array-backed population.")
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
 
 class Population:
-    def __init__(self, patch_population, compartments, patch_id=None):
+    def __init__(self, patch_population, compartments, patch_id=None, validate=False):
         """
         Initializes the population with compartments and a patch population.
         
         :param patch_population: Total population for this patch at the start of the simulation.
         :param compartments: A dictionary of compartments and their counts (e.g., susceptible, infected, etc.).
         :param patch_id: An optional identifier for this specific patch (e.g., district name or ID).
+        :param validate: Whether to check that the compartments sum to the patch population.
         """
         self.patch_population = patch_population
         self.compartments = compartments
         self.patch_id = patch_id
-        self._validate_population()
+        if validate:
+            self._validate_population()
+
+    @classmethod
+    def from_arrays(cls, pop_arr, comp_arr, compartment_names, ids=None, validate=False):
+        """
+        Builds many populations backed by one shared (num_patches, C) array instead of per-patch dicts.
+
+        :param pop_arr: Array of shape (num_patches,) with the total population of each patch.
+        :param comp_arr: Array of shape (num_patches, C) with compartment counts; rows are shared, not copied.
+        :param compartment_names: Names of the C compartment columns.
+        :param ids: Optional patch identifiers, one per row.
+        :param validate: Whether to check every row sums to its patch population (vectorized).
+        :return: List of Population objects whose compartments are views into comp_arr.
+        """
+        pop_arr = np.asarray(pop_arr)
+        comp_arr = np.asarray(comp_arr)
+        ids = [None] * len(comp_arr) if ids is None else ids
+        if not len(pop_arr) == len(comp_arr) == len(ids):
+            raise ValueError(
+                f"pop_arr, comp_arr and ids must have the same length ({len(pop_arr)}, {len(comp_arr)}, {len(ids)})."
+            )
+        if validate:
+            # Same exact test as _validate_population: rows whose vectorized sum
+            # differs are re-summed with fsum before being rejected.
+            for i in np.flatnonzero(comp_arr.sum(axis=1) != pop_arr):
+                total = math.fsum(comp_arr[i])
+                if total != pop_arr[i]:
+                    raise ValueError(f"Compartment sum ({total}) must equal the patch population ({pop_arr[i]}).")
+        index = {c: j for j, c in enumerate(compartment_names)}
+        return [
+            cls(pop, CompartmentView(row, index), patch_id)
+            for pop, row, patch_id in zip(pop_arr, comp_arr, ids)
+        ]
 
     def _validate_population(self):
         """
         Validates that the total population equals the sum of the compartments at the start.
         """
-        total_compartment_sum = sum(self.compartments.values())
+        total_compartment_sum = math.fsum(self.compartments.values())
         if total_compartment_sum != self.patch_population:
             raise ValueError(f"Compartment sum ({total_compartment_sum}) must equal the patch population ({self.patch_population}).")
 
@@ -59,25 +137,166 @@ class CompartmentalModel:
         self.compartments = compartments
         self.parameters = parameters
         self.transitions = transitions
+        self.comp_index = {c: i for i, c in enumerate(compartments)}
+
+        # Stoichiometry matrix: row k holds the -1/+1 compartment changes of
+        # transition k, so deltas = rates @ stoichiometry.
+        self._stoich = np.zeros((len(self.transitions), len(compartments)))
+        for k, tr in enumerate(self.transitions):
+            if tr['from']:
+                self._stoich[k, self.comp_index[tr['from']]] -= 1
+            if tr['to']:
+                self._stoich[k, self.comp_index[tr['to']]] += 1
+
+        # Fuse all rate expressions into one compiled tuple expression so a
+        # single eval yields every transition rate.
+        fused = "(" + "".join(f"({tr['rate']})," for tr in self.transitions) + ")"
+        self._rates_code = compile(fused, '<rates>', 'eval')
+
+        # Evaluation namespace reused across calls; reset from the current
+        # parameters on every call so nothing leaks between evaluations.
+        self._env = {}
+        # Set once a vectorized evaluation fails; the batch paths then go per patch.
+        self._scalar_rates = False
+        # Complex-step differentiation is only exact for rates built from
+        # arithmetic operators; anything else (abs, min, max, ...) uses finite differences.
+        self._complex_step = all(
+            isinstance(node, _ARITHMETIC_NODES) for node in ast.walk(ast.parse(fused, mode='eval'))
+        )
+
+    def _reset_env(self, state_items):
+        """
+        Rebinds the evaluation namespace: state first, then parameters (which take
+        precedence over same-named state entries), as in a fresh {**state, **parameters}.
+        """
+        env = self._env
+        env.clear()
+        env.update(state_items)
+        env.update(self.parameters)
+        return env
 
     def compute_transition_rates(self, state, extras=None):
-        local_env = {**state, **self.parameters}
+        """
+        Computes the net rate of change of every compartment.
+        state: dict of compartment values
+        extras: optional dict of extra variables (e.g., {'lambda_i': ...})
+        Returns an array of deltas in the order of self.compartments.
+        """
+        env = self._reset_env(state)
         if extras:
-            local_env.update(extras)
+            env.update(extras)
 
-        deltas = {c: 0.0 for c in self.compartments}
-        for tr in self.transitions:
-            src = tr['from']
-            dst = tr['to']
-            rate_expr = tr['rate']
-            rate = eval(rate_expr, {}, local_env)
+        rates = np.array(eval(self._rates_code, env), dtype=np.float64)
+        return rates @ self._stoich
 
-            if src:
-                deltas[src] -= rate
-            if dst:
-                deltas[dst] += rate
+    def _rates_batch(self, states, lambdas):
+        """
+        Evaluates every transition rate over many patches.
+        Returns an array of shape (num_patches, n_transitions).
+        """
+        dtype = np.result_type(states, np.float64 if lambdas is None else lambdas)
+        rates = np.empty((states.shape[0], len(self.transitions)), dtype=dtype)
+        if self._scalar_rates:
+            return self._rates_rowwise(states, lambdas, rates)
+
+        env = self._reset_env((c, states[:, i]) for i, c in enumerate(self.compartments))
+        if lambdas is not None:
+            env['lambda_i'] = lambdas
+        try:
+            values = eval(self._rates_code, env)
+        except (TypeError, ValueError):
+            # Rates written for scalars (e.g. "max(R - 1, 0) * 0.01") can't take
+            # whole patch columns; evaluate them one patch at a time from now on.
+            env.clear()
+            self._scalar_rates = True
+            return self._rates_rowwise(states, lambdas, rates)
+
+        # Constant rates evaluate to scalars; broadcast them across patches.
+        for k, rate in enumerate(values):
+            rates[:, k] = rate
+        env.clear()  # don't keep the patch arrays alive between calls
+        return rates
+
+    def _rates_rowwise(self, states, lambdas, rates):
+        """
+        Per-patch fallback of _rates_batch for rate expressions that only accept scalars.
+        Fills and returns rates, of shape (num_patches, n_transitions).
+        """
+        for p, row in enumerate(states):
+            env = self._reset_env(zip(self.compartments, row))
+            if lambdas is not None:
+                env['lambda_i'] = lambdas[p]
+            rates[p] = eval(self._rates_code, env)
+        self._env.clear()
+        return rates
 
-        return deltas
+    def compute_rates_batch(self, states, lambdas=None):
+        """
+        Vectorized counterpart of compute_transition_rates over many patches.
+        states: array of shape (num_patches, C), columns ordered as self.compartments
+        lambdas: optional array of shape (num_patches,) bound to 'lambda_i'
+        Returns an array of deltas with the same shape as states.
+        """
+        return self._rates_batch(states, lambdas) @ self._stoich
+
+    def rate_jacobian_batch(self, states, lambdas=None):
+        """
+        Derivatives of every transition rate over many patches. Rates made only of
+        arithmetic operators (+, -, *, /, **) are differentiated by complex step,
+        exact to rounding; any other rate (function calls such as abs, min, max, or
+        comparisons) falls back to central finite differences.
+        states: array of shape (num_patches, C), columns ordered as self.compartments
+        lambdas: optional array of shape (num_patches,) bound to 'lambda_i'
+        Returns (d_states, d_lambda) of shapes (num_patches, n_transitions, C) and
+        (num_patches, n_transitions); d_lambda is None when lambdas is None.
+        """
+        if not self._complex_step:
+            return self._rate_jacobian_fd(states, lambdas)
+
+        h = 1e-30
+        states = np.array(states, dtype=np.complex128)
+        lambdas = None if lambdas is None else np.asarray(lambdas, dtype=np.complex128)
+
+        d_states = np.empty((states.shape[0], len(self.transitions), len(self.compartments)))
+        for b in range(len(self.compartments)):
+            states[:, b] += 1j * h
+            d_states[:, :, b] = self._rates_batch(states, lambdas).imag / h
+            states[:, b] -= 1j * h
+
+        d_lambda = None
+        if lambdas is not None:
+            d_lambda = self._rates_batch(states, lambdas + 1j * h).imag / h
+        return d_states, d_lambda
+
+    def _rate_jacobian_fd(self, states, lambdas):
+        """
+        Central finite-difference counterpart of rate_jacobian_batch, with a step
+        scaled to each value's magnitude.
+        """
+        def step(x):
+            return np.cbrt(np.finfo(np.float64).eps) * np.maximum(1.0, np.abs(x))
+
+        states = np.array(states, dtype=np.float64)
+        lambdas = None if lambdas is None else np.array(lambdas, dtype=np.float64)
+
+        d_states = np.empty((states.shape[0], len(self.transitions), len(self.compartments)))
+        for b in range(len(self.compartments)):
+            x = states[:, b].copy()
+            h = step(x)
+            states[:, b] = x + h
+            upper = self._rates_batch(states, lambdas)
+            states[:, b] = x - h
+            lower = self._rates_batch(states, lambdas)
+            states[:, b] = x
+            d_states[:, :, b] = (upper - lower) / (2 * h[:, None])
+
+        d_lambda = None
+        if lambdas is not None:
+            h = step(lambdas)
+            d_lambda = (
+                self._rates_batch(states, lambdas + h) - self._rates_batch(states, lambdas - h)
+            ) / (2 * h[:, None])
+        return d_states, d_lambda
 
     def ode_rhs(self, y, t, extras_fn=None):
         """
@@ -88,78 +307,136 @@ class CompartmentalModel:
         """
         state = {c: y[i] for i, c in enumerate(self.compartments)}
         extras = extras_fn(t, y) if extras_fn else None
-        deltas = self.compute_transition_rates(state, extras)
-        return [deltas[c] for c in self.compartments]
+        return self.compute_transition_rates(state, extras)
 
 
 class NetworkModel:
     def __init__(self, base_model, num_patches, network_matrix):
         self.base_model = base_model
         self.num_patches = num_patches
-        self.network = np.array(network_matrix)
+        # Sparse contact networks stay in CSR so the coupling matvec skips zeros.
+        if sparse.issparse(network_matrix):
+            self.network = sparse.csr_matrix(network_matrix, dtype=np.float64)
+        else:
+            self.network = np.ascontiguousarray(network_matrix, dtype=np.float64)
 
+        self.comp_index = base_model.comp_index
         self.all_compartments = [
             f"{c}_{i}" for i in range(num_patches) for c in base_model.compartments
         ]
 
-    def compute_force_of_infection(self, full_state):
-        lambdas = []
-        for i in range(self.num_patches):
-            force = 0
-            for j in range(self.num_patches):
-                I_j = full_state[f"I_{j}"]
-                N_j = sum(full_state[f"{c}_{j}"] for c in self.base_model.compartments)
-                force += self.network[i][j] * I_j / N_j
-            lambdas.append(force)
-        return lambdas
-
-    def simulate_discrete(self, y0_dict, t_range):
-        state = y0_dict.copy()
-        history = {c: [state[c]] for c in self.all_compartments}
-
-        for t in t_range[1:]:
-            new_state = state.copy()
-            lambdas = self.compute_force_of_infection(state)
-
-            for i in range(self.num_patches):
-                patch_state = {c: state[f"{c}_{i}"] for c in self.base_model.compartments}
-                extras = {f"lambda_i": lambdas[i]}
+    def state_array(self, full_state):
+        """
+        Converts a state into a (num_patches, C) array.
+        full_state: dict keyed by self.all_compartments, or an array-like in that order
+        """
+        if isinstance(full_state, dict):
+            full_state = [full_state[c] for c in self.all_compartments]
+        return np.array(full_state, dtype=np.float64).reshape(self.num_patches, -1)
 
-                deltas = self.base_model.compute_transition_rates(patch_state, extras)
+    def compute_force_of_infection(self, state_arr):
+        """
+        Computes the force of infection for every patch.
+        state_arr: array of shape (num_patches, C), columns ordered as base_model.compartments
+        Returns an array of shape (num_patches,) with lambda_i = sum_j W_ij * I_j / N_j.
+        """
+        I = state_arr[:, self.comp_index['I']]
+        N = state_arr.sum(axis=1)
+        return self.network.dot(I / N)
 
-                for c, delta in deltas.items():
-                    key = f"{c}_{i}"
-                    new_state[key] += delta
+    def simulate_discrete(self, y0, t_range):
+        """
+        Simulate the network model as a difference equation.
+        y0: initial state, dict keyed by self.all_compartments or array-like of shape (num_patches, C)
+        t_range: time points
+        Returns t_range and a history array of shape (len(t_range), num_patches, C).
+        """
+        history = np.empty((len(t_range), self.num_patches, len(self.base_model.compartments)))
+        history[0] = self.state_array(y0)
 
+        for k in range(1, len(t_range)):
+            prev, state = history[k - 1], history[k]
+            lambdas = self.compute_force_of_infection(prev)
+            np.add(prev, self.base_model.compute_rates_batch(prev, lambdas), out=state)
             # Clamp negatives
-            state = {k: max(v, 0) for k, v in new_state.items()}
-            for c in self.all_compartments:
-                history[c].append(state[c])
+            np.maximum(state, 0, out=state)
 
         return t_range, history
 
-    def simulate_ode(self, y0_dict, t_range, odesolver, extras_fn=None):
+    def simulate_ode(self, y0, t_range, odesolver, extras_fn=None, **solver_kwargs):
         """
         Simulate the network model using ODE integration.
-        y0_dict: dict of initial compartment values (e.g., {'S_0': ..., 'I_0': ..., ...})
+        y0: initial state, dict keyed by self.all_compartments (e.g., {'S_0': ..., 'I_0': ..., ...})
+            or array-like of shape (num_patches, C)
         t_range: time points
         odesolver: ODE solver function (e.g., scipy.integrate.odeint)
         extras_fn: optional function to provide extra variables (e.g., force of infection)
+        solver_kwargs: passed through to odesolver (e.g., Dfun, rtol, atol)
+        Returns t_range and a history array of shape (len(t_range), num_patches, C).
         """
-        y0 = [y0_dict[c] for c in self.all_compartments]
+        shape = (self.num_patches, len(self.base_model.compartments))
+        y0 = self.state_array(y0).ravel()
         def rhs(y, t):
-            state = {c: y[i] for i, c in enumerate(self.all_compartments)}
-            lambdas = self.compute_force_of_infection(state)
-            dydt = []
-            for i in range(self.num_patches):
-                patch_state = {c: state[f"{c}_{i}"] for c in self.base_model.compartments}
-                extras = {"lambda_i": lambdas[i]}
-                deltas = self.base_model.compute_transition_rates(patch_state, extras)
-                for c in self.base_model.compartments:
-                    dydt.append(deltas[c])
-            return dydt
-        sol = odesolver(rhs, y0, t_range)
-        # Convert solution to history dict
-        sol = np.array(sol)
-        history = {c: sol[:, i] for i, c in enumerate(self.all_compartments)}
-        return t_range, history
\ No newline at end of file
+            Y = y.reshape(shape)
+            lambdas = self.compute_force_of_infection(Y)
+            return self.base_model.compute_rates_batch(Y, lambdas).ravel()
+        sol = odesolver(rhs, y0, t_range, **solver_kwargs)
+        history = np.asarray(sol).reshape(len(t_range), *shape)
+        return t_range, history
+
+    def ode_jacobian_sparse(self, y, t):
+        """
+        Analytic Jacobian of the network ODE right-hand side as a sparse matrix,
+        built from the network's nonzeros (suitable as solve_ivp's jac for BDF/Radau).
+        y: flat state in the order of self.all_compartments
+        t: current time (passed by ODE solver)
+        Returns a CSR matrix of shape (num_patches * C, num_patches * C).
+        """
+        P, C = self.num_patches, len(self.base_model.compartments)
+        Y = np.reshape(y, (P, C))
+        N = Y.sum(axis=1)
+        I_idx = self.comp_index['I']
+        lambdas = self.compute_force_of_infection(Y)
+        d_states, d_lambda = self.base_model.rate_jacobian_batch(Y, lambdas)
+        stoich = self.base_model._stoich
+        comps = np.arange(C)
+
+        # Coupling through lambda_i = sum_j W_ij * I_j / N_j: one C x C block
+        # A[i, :] (x) dq[j, :] * W_ij per network edge (i, j)
+        A = d_lambda @ stoich
+        dq = np.outer(-Y[:, I_idx] / N**2, np.ones(C))
+        dq[:, I_idx] += 1 / N
+        W = sparse.coo_matrix(self.network)
+        i, j = W.row, W.col
+        coupling = A[i, :, None] * W.data[:, None, None] * dq[j, None, :]
+        coupling_rows = np.broadcast_to((i * C)[:, None, None] + comps[None, :, None], coupling.shape)
+        coupling_cols = np.broadcast_to((j * C)[:, None, None] + comps[None, None, :], coupling.shape)
+
+        # Within-patch terms on the block diagonal
+        blocks = np.einsum('ka,pkb->pab', stoich, d_states)
+        p = np.arange(P)
+        block_rows = np.broadcast_to((p * C)[:, None, None] + comps[None, :, None], blocks.shape)
+        block_cols = np.broadcast_to((p * C)[:, None, None] + comps[None, None, :], blocks.shape)
+
+        # Duplicate (row, col) entries, e.g. from W_ii, are summed by the conversion
+        jac = sparse.coo_matrix(
+            (
+                np.concatenate([coupling.ravel(), blocks.ravel()]),
+                (
+                    np.concatenate([coupling_rows.ravel(), block_rows.ravel()]),
+                    np.concatenate([coupling_cols.ravel(), block_cols.ravel()]),
+                ),
+            ),
+            shape=(P * C, P * C),
+        )
+        return jac.tocsr()
+
+    def ode_jacobian(self, y, t):
+        """
+        Analytic Jacobian of the network ODE right-hand side, for use as odeint's Dfun
+        (which needs a dense array); see ode_jacobian_sparse for the sparse form.
+        y: flat state in the order of self.all_compartments
+        t: current time (passed by ODE solver)
+        Returns an array of shape (num_patches * C, num_patches * C).
+        """
+        return self.ode_jacobian_sparse(y, t).toarray()
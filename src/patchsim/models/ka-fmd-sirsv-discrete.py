@@ -2,96 +2,100 @@ import warnings
 
 import numpy as np
 import logging
-from tqdm import tqdm
-import random
+from patchsim.utils.jit import njit, prange
 
 warnings.filterwarnings('ignore')
 
-
-def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42, diagnosis=None):
+logger = logging.getLogger(__name__)
+
+
+@njit(cache=True)
+def _push(buf, n, values):
+    """
+    Writes values into buf[n:], growing the buffer if needed. Returns (buf, new_n).
+    """
+    k = values.shape[0]
+    if n + k > buf.shape[0]:
+        grown = np.empty(max(2 * buf.shape[0], n + k), dtype=buf.dtype)
+        grown[:n] = buf[:n]
+        buf = grown
+    buf[n:n + k] = values
+    return buf, n + k
+
+
+@njit(cache=True)
+def _wane(buf, n):
+    """
+    Drops expired waning times from buf[:n] and decrements the rest, keeping
+    survivors packed at the front of the buffer. Returns the new valid length.
+    """
+    live = buf[:n]
+    keep = live > 0
+    n_new = np.count_nonzero(keep)
+    buf[:n_new] = live[keep] - 1
+    return n_new
+
+
+@njit(cache=True)
+def _sirsv_step_kernel(S, I, R, V, decay_vax, decay_rec, vax_len,
+                       is_round_start, is_vax,
+                       beta, gamma, vax_rate,
+                       weibull_shape_vax, weibull_scale_vax,
+                       weibull_shape_rec, weibull_scale_rec,
+                       seed_rate, vax_period, targeted, random_seed):
+    """
+    Runs the daily SIRSV loop in place on the preallocated S, I, R, V arrays.
+    decay_vax/decay_rec hold remaining immunity (days) in their first n_vax/n_rec
+    slots; vax_len records n_vax per day for diagnostics. is_round_start/is_vax
+    are the precomputed per-day vaccination schedule.
+    """
     np.random.seed(random_seed)
-    random.seed(random_seed)
-
-    # Extract parameters
-    beta = params['beta']
-    gamma = params['gamma']
-    vax_rate = params['vax_rate']
-    weibull_shape_vax = params['weibull_shape_vax']
-    weibull_scale_vax = params['weibull_scale_vax']
-    weibull_shape_rec = params['weibull_shape_rec']
-    weibull_scale_rec = params['weibull_scale_rec']
-    days = params['days']
-    seed_rate = params['seed_rate']
-    vax_period = params['vax_period']
-    vax_duration = params['vax_duration']
-    start_vax_day = params['start_vax_day']
-
-    # Initial conditions
-    S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
-    N = S0 + I0 + R0 + V0
-
-    S, I, R, V = [np.zeros(days) for _ in range(4)]
-    S[0], I[0], R[0], V[0] = S0, I0, R0, V0
-
-    decay_times_vax = []
-    decay_times_rec = []
+    days = S.shape[0]
+    N = S[0] + I[0] + R[0] + V[0]
 
     # Seed initial vaccinated and recovered individuals' waning times
-    if V0 > 0:
-        decay_times_vax.extend((weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V0))).astype(int).tolist())
-    if R0 > 0:
-        decay_times_rec.extend((weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R0))).astype(int).tolist())
-
-    round_counter = 0
-
-    logging.info(f"Starting simulation for scenario: {scenario}")
-
-    for t in tqdm(range(1, days), desc=f"Running {scenario} simulation", unit="day"):
+    n_vax = 0
+    n_rec = 0
+    if V[0] > 0:
+        samples = weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V[0]))
+        decay_vax, n_vax = _push(decay_vax, n_vax, samples.astype(np.int32))
+    if R[0] > 0:
+        samples = weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R[0]))
+        decay_rec, n_rec = _push(decay_rec, n_rec, samples.astype(np.int32))
+    vax_len[0] = n_vax
+
+    to_vaccinate = 0.0
+    for t in range(1, days):
         new_seeds = min(seed_rate, S[t-1])
 
         # VACCINATION ROUND
-        if t == start_vax_day or (t > start_vax_day and (t - start_vax_day) % vax_period == 0):
-            round_counter += 1
+        if is_round_start[t]:
             to_vaccinate = min(vax_rate * S[t-1], S[t-1])
-            logging.info(f"Round {round_counter} start day: {t}")
 
             # Calculate the number of vaccinations to reset, considering the vaccination period
             num_vax_to_reset = int(min(vax_rate * vax_period * V[t-1], V[t-1]))
-            if num_vax_to_reset > 0 and len(decay_times_vax) > 0:
-                num_vax_to_reset = min(num_vax_to_reset, len(decay_times_vax))
-
-                # Method 1: Randomly select decay times to reset
-                indices_to_reset = random.sample(range(len(decay_times_vax)), num_vax_to_reset)
-
-                # Method 2: Sort decay times and select indices with the lowest decay times
-                # sorted_indices = np.argsort(decay_times_vax)
-                # indices_to_reset = sorted_indices[:num_vax_to_reset]
-
-                for i in indices_to_reset:
-                    decay_times_vax[i] = weibull_scale_vax * np.random.weibull(weibull_shape_vax)
-                logging.info(f"Day {t}: Re-vaccination reset: {num_vax_to_reset} decay times reset")
-
-            # if diagnosis:
-                # plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=True)
+            if num_vax_to_reset > 0 and n_vax > 0:
+                num_vax_to_reset = min(num_vax_to_reset, n_vax)
+
+                if targeted:
+                    # Select indices with the lowest decay times
+                    if num_vax_to_reset < n_vax:
+                        indices_to_reset = np.argpartition(decay_vax[:n_vax], num_vax_to_reset)[:num_vax_to_reset]
+                    else:
+                        indices_to_reset = np.arange(n_vax)
+                else:
+                    # Randomly select decay times to reset
+                    indices_to_reset = np.random.choice(n_vax, num_vax_to_reset, replace=False)
+
+                samples = weibull_scale_vax * np.random.weibull(weibull_shape_vax, num_vax_to_reset)
+                decay_vax[indices_to_reset] = samples.astype(np.int32)
 
         # Check if it's within a vaccination period
-        is_vax_period = (t >= start_vax_day) and ((t - start_vax_day) % vax_period < vax_duration)
-        if is_vax_period:
+        if is_vax[t]:
             new_vaccinations = int(to_vaccinate)
-            logging.info(f"Day {t}: Daily vaccinations: {new_vaccinations}")
-
-            # Update compartments for new vaccinations
             if new_vaccinations > 0:
-                new_susceptible_decay_times = (weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)).astype(int).tolist()
-                initial_len = len(decay_times_vax)
-                decay_times_vax.extend(new_susceptible_decay_times)
-                updated_len = len(decay_times_vax)
-                logging.info(f"Day {t}: New vaccinations: {new_vaccinations}, Length of decay_times_vax: {initial_len}, Length of decay_times_vax: {updated_len}")
-            else:
-                S[t] = S[t-1]
-                R[t] = R[t-1]
-                V[t] = V[t-1]
-
+                samples = weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)
+                decay_vax, n_vax = _push(decay_vax, n_vax, samples.astype(np.int32))
         else:
             new_vaccinations = 0
 
@@ -106,193 +110,278 @@ def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42
         V[t] = V[t-1] + new_vaccinations
 
         if new_recoveries > 0:
-            new_recovered_decay_times = (weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))).astype(int).tolist()
-            decay_times_rec.extend(new_recovered_decay_times)
+            samples = weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))
+            decay_rec, n_rec = _push(decay_rec, n_rec, samples.astype(np.int32))
 
         # IMMUNITY WANING
-        logging.info(f"Day {t}: Before waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
-
-        decay_times_vax_before = len(decay_times_vax)
-        decay_times_vax = [x - 1 for x in decay_times_vax if x > 0]
-        num_waned_vax = decay_times_vax_before - len(decay_times_vax)
-
-        decay_times_rec_before = len(decay_times_rec)
-        decay_times_rec = [x - 1 for x in decay_times_rec if x > 0]
-        num_waned_rec = decay_times_rec_before - len(decay_times_rec)
+        n_vax_before = n_vax
+        n_vax = _wane(decay_vax, n_vax)
+        num_waned_vax = n_vax_before - n_vax
 
-        logging.info(f"Day {t}: Waned vaccinated: {num_waned_vax}, Waned recovered: {num_waned_rec}")
-        logging.info(f"Day {t}: After waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
+        n_rec_before = n_rec
+        n_rec = _wane(decay_rec, n_rec)
+        num_waned_rec = n_rec_before - n_rec
 
         # Move waned individuals back to susceptible compartment
         S[t] += num_waned_vax + num_waned_rec
         V[t] -= num_waned_vax
         R[t] -= num_waned_rec
 
-        # DIAGNOSIS AND LOG
-        logging.info(f"Day {t}: Length of decay_times_vax={len(decay_times_vax)}, V[{t}]={V[t]}, Difference={V[t] - len(decay_times_vax)}")
-        logging.info(f"Day {t}: S[t]={S[t]}, I[t]={I[t]}, R[t]={R[t]}, V[t]={V[t]}, Waned_vax={num_waned_vax}")
-
-        if len(decay_times_vax) != V[t]:
-            logging.warning(f"Day {t}: Length discrepancy: Length of decay_times_vax={len(decay_times_vax)}, V[t]={V[t]}")
-
-        total_population = S[t] + I[t] + R[t] + V[t]
-        if not np.isclose(total_population, N):
-            logging.error(f"Population not conserved on day {t}: Total={total_population}, Expected={N}")
-
-        if S[t] < 0 or I[t] < 0 or R[t] < 0 or V[t] < 0:
-            logging.error(f"Negative compartment values on day {t}: S={S[t]}, I={I[t]}, R={R[t]}, V={V[t]}")
-
-        # if is_vax_period and ((t - start_vax_day) % vax_period == vax_duration - 1) and diagnosis:
-            # plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=False)
-
-        if t % 30 == 0 or is_vax_period:
-            logging.info(f"Day {t}: S={S[t]:.2f}, I={I[t]:.2f}, R={R[t]:.2f}, V={V[t]:.2f}, New Vaccinations={new_vaccinations if is_vax_period else 0}")
-
-    logging.info(f"Simulation of the {scenario.capitalize()} model completed.")
-
-    return S, I, R, V
-
-
-def sirsv_model_with_weibull_targetted_vaccination(params, scenario, random_seed=42, diagnosis=None):
-    np.random.seed(random_seed)
-    random.seed(random_seed)
-
-    # Extract parameters
-    beta = params['beta']
-    gamma = params['gamma']
-    vax_rate = params['vax_rate']
-    weibull_shape_vax = params['weibull_shape_vax']
-    weibull_scale_vax = params['weibull_scale_vax']
-    weibull_shape_rec = params['weibull_shape_rec']
-    weibull_scale_rec = params['weibull_scale_rec']
-    days = params['days']
-    seed_rate = params['seed_rate']
-    vax_period = params['vax_period']
-    vax_duration = params['vax_duration']
-    start_vax_day = params['start_vax_day']
-
-    # Initial conditions
-    S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
-    N = S0 + I0 + R0 + V0
-
-    S, I, R, V = [np.zeros(days) for _ in range(4)]
-    S[0], I[0], R[0], V[0] = S0, I0, R0, V0
-
-    decay_times_vax = []
-    decay_times_rec = []
+        vax_len[t] = n_vax
+
+
+@njit(cache=True, parallel=True)
+def _sirsv_batch_kernel(S, I, R, V, vax_len, capacity,
+                        is_round_start, is_vax,
+                        beta, gamma, vax_rate,
+                        weibull_shape_vax, weibull_scale_vax,
+                        weibull_shape_rec, weibull_scale_rec,
+                        seed_rate, vax_period, targeted, random_seed):
+    """
+    Runs independent replicates of the SIRSV loop in parallel, one per row of
+    S, I, R, V. Replicate b gets its own waning buffers and RNG seed random_seed + b.
+    """
+    for b in prange(S.shape[0]):
+        decay_vax = np.empty(capacity, dtype=np.int32)
+        decay_rec = np.empty(capacity, dtype=np.int32)
+        _sirsv_step_kernel(
+            S[b], I[b], R[b], V[b], decay_vax, decay_rec, vax_len[b],
+            is_round_start, is_vax,
+            beta, gamma, vax_rate,
+            weibull_shape_vax, weibull_scale_vax,
+            weibull_shape_rec, weibull_scale_rec,
+            seed_rate, vax_period, targeted, random_seed + b,
+        )
+
+
+def _sirsv_batch_xp(xp, S, I, R, V, vax_len, capacity,
+                    is_round_start, is_vax,
+                    beta, gamma, vax_rate,
+                    weibull_shape_vax, weibull_scale_vax,
+                    weibull_shape_rec, weibull_scale_rec,
+                    seed_rate, vax_period, targeted, random_seed):
+    """
+    Array-module implementation of the batched SIRSV loop, used for the GPU backend
+    with xp = cupy. Every day is a handful of elementwise/scatter operations over all
+    replicates at once. Waning buffers are (B, capacity + 1) arrays with per-row valid
+    lengths; the extra last column absorbs masked-out scatter writes. Host-side upper
+    bounds on the row lengths and daily additions, refreshed with one small device
+    sync per day, keep each day's draws and scans to the columns actually in use.
+    """
+    xp.random.seed(random_seed)
+    B, days = S.shape
+    N = S[0, 0] + I[0, 0] + R[0, 0] + V[0, 0]
+    rows = xp.arange(B)[:, None]
+    cols = xp.arange(capacity + 1)[None, :]
+    trash = capacity
+
+    def weibull(shape, scale, k):
+        return (scale * xp.random.weibull(shape, (B, k))).astype(xp.int32)
+
+    def push(buf, n, k, samples):
+        # Append the first k[b] samples of row b at buf[b, n[b]:]
+        j = xp.arange(samples.shape[1])[None, :]
+        dest = n[:, None] + j
+        dest = xp.where((j < k[:, None]) & (dest < capacity), dest, trash)
+        buf[rows, dest] = samples
+        return xp.minimum(n + k, capacity)
+
+    def wane(buf, n, hi):
+        # Drop expired entries, decrement the rest and re-pack them at the front;
+        # hi bounds n from above, so only the first hi columns are scanned
+        head = buf[:, :hi]
+        keep = (cols[:, :hi] < n[:, None]) & (head > 0)
+        dest = xp.where(keep, xp.cumsum(keep, axis=1) - 1, trash)
+        buf[rows, dest] = head - 1
+        return keep.sum(axis=1)
 
     # Seed initial vaccinated and recovered individuals' waning times
-    if V0 > 0:
-        decay_times_vax.extend((weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V0))).astype(int).tolist())
-    if R0 > 0:
-        decay_times_rec.extend((weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R0))).astype(int).tolist())
-
-    round_counter = 0
-
-    logging.info(f"Starting simulation for scenario: {scenario}")
-
-    for t in tqdm(range(1, days), desc=f"Running {scenario} simulation", unit="day"):
-        new_seeds = min(seed_rate, S[t-1])
+    decay_vax = xp.zeros((B, capacity + 1), dtype=xp.int32)
+    decay_rec = xp.zeros((B, capacity + 1), dtype=xp.int32)
+    n_vax = xp.zeros(B, dtype=xp.int64)
+    n_rec = xp.zeros(B, dtype=xp.int64)
+    k_vax0, k_rec0 = int(V[0, 0]), int(R[0, 0])
+    if k_vax0 > 0:
+        n_vax = push(decay_vax, n_vax, xp.full(B, k_vax0), weibull(weibull_shape_vax, weibull_scale_vax, k_vax0))
+    if k_rec0 > 0:
+        n_rec = push(decay_rec, n_rec, xp.full(B, k_rec0), weibull(weibull_shape_rec, weibull_scale_rec, k_rec0))
+    vax_len[:, 0] = n_vax
+    vax_hi, rec_hi = min(k_vax0, capacity), min(k_rec0, capacity)
+
+    new_vaccinations = xp.zeros(B, dtype=xp.int64)
+    max_vax = 0
+    for t in range(1, days):
+        new_seeds = xp.minimum(seed_rate, S[:, t-1])
 
         # VACCINATION ROUND
-        if t == start_vax_day or (t > start_vax_day and (t - start_vax_day) % vax_period == 0):
-            round_counter += 1
-            to_vaccinate = min(vax_rate * S[t-1], S[t-1])
-            logging.info(f"Round {round_counter} start day: {t}")
-
-            # Calculate the number of vaccinations to reset, considering the vaccination period
-            num_vax_to_reset = int(min(vax_rate * vax_period * V[t-1], V[t-1]))
-            if num_vax_to_reset > 0 and len(decay_times_vax) > 0:
-                num_vax_to_reset = min(num_vax_to_reset, len(decay_times_vax))
-
-                # Method 1: Randomly select decay times to reset
-                # indices_to_reset = random.sample(range(len(decay_times_vax)), num_vax_to_reset)
-
-                # Method 2: Sort decay times and select indices with the lowest decay times
-                sorted_indices = np.argsort(decay_times_vax)
-                indices_to_reset = sorted_indices[:num_vax_to_reset]
-
-                for i in indices_to_reset:
-                    decay_times_vax[i] = weibull_scale_vax * np.random.weibull(weibull_shape_vax)
-                logging.info(f"Day {t}: Re-vaccination reset: {num_vax_to_reset} decay times reset")
-
-            # if diagnosis:
-                # plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=True)
+        if is_round_start[t]:
+            to_vaccinate = xp.minimum(vax_rate * S[:, t-1], S[:, t-1])
+            new_vaccinations = to_vaccinate.astype(xp.int64)
+            num_vax_to_reset = xp.minimum(vax_rate * vax_period * V[:, t-1], V[:, t-1]).astype(xp.int64)
+            num_vax_to_reset = xp.minimum(num_vax_to_reset, n_vax)
+            # Rounds are rare: sync the longest buffer and the largest reset and
+            # daily vaccination counts once per round
+            vax_hi, max_reset, max_vax = (int(v) for v in xp.stack(
+                [n_vax.max(), num_vax_to_reset.max(), new_vaccinations.max()]).tolist())
+
+            if max_reset > 0:
+                # Rank valid entries per row by decay time (targeted) or a random key
+                head = decay_vax[:, :vax_hi]
+                valid = cols[:, :vax_hi] < n_vax[:, None]
+                if targeted:
+                    keys = xp.where(valid, head, xp.iinfo(xp.int32).max)
+                else:
+                    keys = xp.where(valid, xp.random.random((B, vax_hi)), 2.0)
+                order = xp.argsort(keys, axis=1)
+                ranks = xp.empty_like(order)
+                ranks[rows, order] = cols[:, :vax_hi]
+                # The entry of rank r takes the r-th fresh sample of its row
+                samples = weibull(weibull_shape_vax, weibull_scale_vax, max_reset)
+                reset = ranks < num_vax_to_reset[:, None]
+                head[...] = xp.where(reset, samples[rows, xp.minimum(ranks, max_reset - 1)], head)
 
         # Check if it's within a vaccination period
-        is_vax_period = (t >= start_vax_day) and ((t - start_vax_day) % vax_period < vax_duration)
-        if is_vax_period:
-            new_vaccinations = int(to_vaccinate)
-            logging.info(f"Day {t}: Daily vaccinations: {new_vaccinations}")
-
-            # Update compartments for new vaccinations
-            if new_vaccinations > 0:
-                new_susceptible_decay_times = (weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)).astype(int).tolist()
-                initial_len = len(decay_times_vax)
-                decay_times_vax.extend(new_susceptible_decay_times)
-                updated_len = len(decay_times_vax)
-                logging.info(f"Day {t}: New vaccinations: {new_vaccinations}, Length of decay_times_vax: {initial_len}, Length of decay_times_vax: {updated_len}")
-            else:
-                S[t] = S[t-1]
-                R[t] = R[t-1]
-                V[t] = V[t-1]
-
+        if is_vax[t]:
+            if max_vax > 0:
+                n_vax = push(decay_vax, n_vax, new_vaccinations,
+                             weibull(weibull_shape_vax, weibull_scale_vax, max_vax))
+                vax_hi = min(vax_hi + max_vax, capacity)
+            vaccinated = new_vaccinations
         else:
-            new_vaccinations = 0
+            vaccinated = xp.zeros(B, dtype=xp.int64)
 
         # Calculate transitions
-        new_infections = beta * S[t-1] * I[t-1] / N + new_seeds
-        new_recoveries = gamma * I[t-1]
+        new_infections = beta * S[:, t-1] * I[:, t-1] / N + new_seeds
+        new_recoveries = gamma * I[:, t-1]
 
         # Update compartments
-        S[t] = S[t-1] - new_infections - new_vaccinations
-        I[t] = I[t-1] + new_infections - new_recoveries
-        R[t] = R[t-1] + new_recoveries
-        V[t] = V[t-1] + new_vaccinations
-
-        if new_recoveries > 0:
-            new_recovered_decay_times = (weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))).astype(int).tolist()
-            decay_times_rec.extend(new_recovered_decay_times)
+        S[:, t] = S[:, t-1] - new_infections - vaccinated
+        I[:, t] = I[:, t-1] + new_infections - new_recoveries
+        R[:, t] = R[:, t-1] + new_recoveries
+        V[:, t] = V[:, t-1] + vaccinated
+
+        # The one sync per day: size the recovery draws to the largest row
+        k_rec = new_recoveries.astype(xp.int64)
+        rec_hi, max_rec = (int(v) for v in xp.stack([n_rec.max(), k_rec.max()]).tolist())
+        if max_rec > 0:
+            n_rec = push(decay_rec, n_rec, k_rec, weibull(weibull_shape_rec, weibull_scale_rec, max_rec))
+            rec_hi = min(rec_hi + max_rec, capacity)
 
         # IMMUNITY WANING
-        logging.info(f"Day {t}: Before waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
-
-        decay_times_vax_before = len(decay_times_vax)
-        decay_times_vax = [x - 1 for x in decay_times_vax if x > 0]
-        num_waned_vax = decay_times_vax_before - len(decay_times_vax)
-
-        decay_times_rec_before = len(decay_times_rec)
-        decay_times_rec = [x - 1 for x in decay_times_rec if x > 0]
-        num_waned_rec = decay_times_rec_before - len(decay_times_rec)
-
-        logging.info(f"Day {t}: Waned vaccinated: {num_waned_vax}, Waned recovered: {num_waned_rec}")
-        logging.info(f"Day {t}: After waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
+        n_vax_before, n_rec_before = n_vax, n_rec
+        n_vax = wane(decay_vax, n_vax, vax_hi)
+        n_rec = wane(decay_rec, n_rec, rec_hi)
 
         # Move waned individuals back to susceptible compartment
-        S[t] += num_waned_vax + num_waned_rec
-        V[t] -= num_waned_vax
-        R[t] -= num_waned_rec
+        S[:, t] += (n_vax_before - n_vax) + (n_rec_before - n_rec)
+        V[:, t] -= n_vax_before - n_vax
+        R[:, t] -= n_rec_before - n_rec
 
-        # DIAGNOSIS AND LOG
-        logging.info(f"Day {t}: Length of decay_times_vax={len(decay_times_vax)}, V[{t}]={V[t]}, Difference={V[t] - len(decay_times_vax)}")
-        logging.info(f"Day {t}: S[t]={S[t]}, I[t]={I[t]}, R[t]={R[t]}, V[t]={V[t]}, Waned_vax={num_waned_vax}")
+        vax_len[:, t] = n_vax
 
-        if len(decay_times_vax) != V[t]:
-            logging.warning(f"Day {t}: Length discrepancy: Length of decay_times_vax={len(decay_times_vax)}, V[t]={V[t]}")
 
-        total_population = S[t] + I[t] + R[t] + V[t]
-        if not np.isclose(total_population, N):
-            logging.error(f"Population not conserved on day {t}: Total={total_population}, Expected={N}")
+def _prepare_batch(params, batch, targeted, random_seed):
+    """
+    Allocates the (batch, days) state and vaccine-buffer length arrays, with day 0
+    set from params, and the argument tuple shared by _sirsv_batch_kernel and
+    _sirsv_batch_xp (waning buffer capacity, vaccination schedule, rates, seed).
+    """
+    days = params['days']
+    S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
+    N = S0 + I0 + R0 + V0
 
-        if S[t] < 0 or I[t] < 0 or R[t] < 0 or V[t] < 0:
-            logging.error(f"Negative compartment values on day {t}: S={S[t]}, I={I[t]}, R={R[t]}, V={V[t]}")
+    S, I, R, V = [np.zeros((batch, days)) for _ in range(4)]
+    S[:, 0], I[:, 0], R[:, 0], V[:, 0] = S0, I0, R0, V0
+    vax_len = np.zeros((batch, days), dtype=np.int64)
+
+    # Waning buffers start sized to the total population and grow if exceeded
+    capacity = int(N) + 1
+
+    # Vaccination schedule: a round starts every vax_period days from start_vax_day
+    # and vaccinates for the following vax_duration days
+    round_days = np.arange(params['start_vax_day'], days, params['vax_period'])
+    is_round_start = np.zeros(days, dtype=np.bool_)
+    is_round_start[round_days] = True
+    is_vax = np.zeros(days, dtype=np.bool_)
+    for d in round_days:
+        is_vax[d:d + params['vax_duration']] = True
+
+    args = (
+        capacity, is_round_start, is_vax,
+        float(params['beta']), float(params['gamma']), float(params['vax_rate']),
+        float(params['weibull_shape_vax']), float(params['weibull_scale_vax']),
+        float(params['weibull_shape_rec']), float(params['weibull_scale_rec']),
+        float(params['seed_rate']), int(params['vax_period']),
+        targeted, random_seed,
+    )
+    return (S, I, R, V, vax_len), args
+
+
+def sirsv_model_with_weibull_vaccination(params, scenario, random_seed=42, diagnosis=None,
+                                         selection_mode='random', replicates=None, backend='cpu'):
+    """
+    Runs the SIRSV model with Weibull-distributed waning of vaccine- and infection-derived immunity.
+    selection_mode chooses which vaccinated individuals are re-vaccinated at the start of a round:
+    'random' picks them uniformly, 'targeted' picks those closest to waning.
+    replicates: number of independent Monte-Carlo replicates to run as one batch. When given,
+    S, I, R, V are returned with shape (replicates, days) and replicate b is seeded with
+    random_seed + b; when None a single trajectory of shape (days,) is returned.
+    backend: 'cpu' runs the (optionally Numba-compiled) kernel; 'gpu' runs all replicates
+    on the device with CuPy, which draws from CuPy's RNG stream instead.
+    """
+    if selection_mode not in ('random', 'targeted'):
+        raise ValueError(f"Unknown selection mode: {selection_mode}")
+    if backend not in ('cpu', 'gpu'):
+        raise ValueError(f"Unknown backend: {backend}")
+    targeted = selection_mode == 'targeted'
+
+    days = params['days']
+    batch = 1 if replicates is None else replicates
+    N = params['S0'] + params['I0'] + params['R0'] + params['V0']
+    (S, I, R, V, vax_len), args = _prepare_batch(params, batch, targeted, random_seed)
+
+    logger.info("Starting simulation for scenario: %s (%d replicate(s))", scenario, batch)
+
+    if backend == 'gpu':
+        try:
+            import cupy as xp
+        except ImportError as e:
+            raise ImportError("backend='gpu' requires CuPy to be installed") from e
+        state = [xp.asarray(a) for a in (S, I, R, V, vax_len)]
+        _sirsv_batch_xp(xp, *state, *args)
+        S, I, R, V, vax_len = [xp.asnumpy(a) for a in state]
+    else:
+        _sirsv_batch_kernel(S, I, R, V, vax_len, *args)
+
+    # DIAGNOSIS AND LOG
+    for b, t in np.argwhere(vax_len[:, 1:] != V[:, 1:]) + (0, 1):
+        logger.warning("Replicate %d, day %d: Length discrepancy: Length of decay_times_vax=%d, V[t]=%s",
+                       b, t, vax_len[b, t], V[b, t])
+
+    total_population = S + I + R + V
+    for b, t in np.argwhere(~np.isclose(total_population[:, 1:], N)) + (0, 1):
+        logger.error("Replicate %d: Population not conserved on day %d: Total=%s, Expected=%s",
+                     b, t, total_population[b, t], N)
+
+    for b, t in np.argwhere(((S < 0) | (I < 0) | (R < 0) | (V < 0))[:, 1:]) + (0, 1):
+        logger.error("Replicate %d: Negative compartment values on day %d: S=%s, I=%s, R=%s, V=%s",
+                     b, t, S[b, t], I[b, t], R[b, t], V[b, t])
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for t in range(30, days, 30):
+            logger.debug("Day %d (mean over replicates): S=%.2f, I=%.2f, R=%.2f, V=%.2f",
+                         t, S[:, t].mean(), I[:, t].mean(), R[:, t].mean(), V[:, t].mean())
+
+    logger.info("Simulation of the %s model completed.", scenario.capitalize())
+
+    if replicates is None:
+        return S[0], I[0], R[0], V[0]
+    return S, I, R, V
 
-        # if is_vax_period and ((t - start_vax_day) % vax_period == vax_duration - 1) and diagnosis:
-            # plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=False)
 
-        if t % 30 == 0 or is_vax_period:
-            logging.info(f"Day {t}: S={S[t]:.2f}, I={I[t]:.2f}, R={R[t]:.2f}, V={V[t]:.2f}, New Vaccinations={new_vaccinations if is_vax_period else 0}")
+def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42, diagnosis=None):
+    return sirsv_model_with_weibull_vaccination(params, scenario, random_seed, diagnosis, selection_mode='random')
 
-    logging.info(f"Simulation of the {scenario.capitalize()} model completed.")
 
-    return S, I, R, V
\ No newline at end of file
+def sirsv_model_with_weibull_targetted_vaccination(params, scenario, random_seed=42, diagnosis=None):
+    return sirsv_model_with_weibull_vaccination(params, scenario, random_seed, diagnosis, selection_mode='targeted')
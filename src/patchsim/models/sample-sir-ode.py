@@ -1,12 +1,165 @@
 import yaml
 import numpy as np
 import pandas as pd
-from scipy.integrate import odeint
+from scipy import sparse
+from scipy.integrate import solve_ivp
 from patchsim.core.model import CompartmentalModel, NetworkModel
+from patchsim.utils.jit import get_num_threads, njit, prange
+from patchsim.utils.loader import build_network_matrix
 from patchsim.utils.viz import plot_patch_subplots
 from patchsim.utils.logger import setup_logger
 import os
 
+# Smallest network for which the threaded RHS is used (given more than one Numba
+# thread). Below this, starting the threads on every RHS call costs more than the
+# per-patch loops save.
+PARALLEL_MIN_PATCHES = 20000
+
+
+@njit(cache=True, fastmath=True)
+def sir_ode(S, I, R, lam, beta, gamma):
+    """
+    SIR derivatives given the force of infection lam; works on scalars or
+    elementwise on per-patch arrays.
+    """
+    new_infections = beta * S * lam
+    recoveries = gamma * I
+    return -new_infections, new_infections - recoveries, recoveries
+
+
+@njit(cache=True, fastmath=True)
+def spmv(indptr, indices, data, x, out):
+    """
+    out = W @ x for W given by its CSR arrays.
+    """
+    for i in range(out.shape[0]):
+        acc = 0.0
+        for k in range(indptr[i], indptr[i + 1]):
+            acc += data[k] * x[indices[k]]
+        out[i] = acc
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def rhs_into(y, beta, gamma, indptr, indices, data, N, work, dy):
+    """
+    Write the derivatives of the coupled SIR system packed as y = [S, I, R]
+    (each num_patches long) into dy. The network W is passed as CSR arrays;
+    N holds the (conserved) patch populations and work is scratch space of
+    length 2 * num_patches.
+    """
+    n = N.shape[0]
+    x = work[:n]
+    lam = work[n:]
+    for i in range(n):
+        x[i] = y[n + i] / N[i]
+    spmv(indptr, indices, data, x, lam)
+    for i in range(n):
+        dy[i], dy[n + i], dy[2 * n + i] = sir_ode(y[i], y[n + i], y[2 * n + i], lam[i], beta, gamma)
+    return dy
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def rhs_into_parallel(y, beta, gamma, indptr, indices, data, N, work, dy):
+    """
+    rhs_into with the per-patch loops spread over Numba threads. Thread start-up
+    costs more than the loops themselves on small networks, so this is only
+    used from PARALLEL_MIN_PATCHES patches up and with more than one thread.
+    """
+    n = N.shape[0]
+    x = work[:n]
+    lam = work[n:]
+    for i in prange(n):
+        x[i] = y[n + i] / N[i]
+    spmv(indptr, indices, data, x, lam)
+    for i in prange(n):
+        dy[i], dy[n + i], dy[2 * n + i] = sir_ode(y[i], y[n + i], y[2 * n + i], lam[i], beta, gamma)
+    return dy
+
+
+@njit(cache=True, fastmath=True)
+def rhs(t, y, beta, gamma, indptr, indices, data, N):
+    """
+    Derivatives of the packed coupled SIR system, as a new array (solve_ivp signature).
+    """
+    n = N.shape[0]
+    return rhs_into(y, beta, gamma, indptr, indices, data, N, np.empty(2 * n), np.empty(3 * n))
+
+
+@njit(cache=True, fastmath=True)
+def jac(t, y, beta, gamma, indptr, indices, data, N):
+    """
+    Analytic Jacobian of rhs, shape (3 * num_patches, 3 * num_patches), in the
+    same packed [S, I, R] ordering.
+    """
+    n = N.shape[0]
+    S = y[:n]
+    I = y[n:2 * n]
+    lam = spmv(indptr, indices, data, I / N, np.empty(n))
+    J = np.zeros((3 * n, 3 * n))
+    for i in range(n):
+        J[i, i] = -beta * lam[i]
+        J[n + i, i] = beta * lam[i]
+        for k in range(indptr[i], indptr[i + 1]):
+            j = indices[k]
+            d = beta * S[i] * data[k] / N[j]
+            J[i, n + j] -= d
+            J[n + i, n + j] += d
+        J[n + i, n + i] -= gamma
+        J[2 * n + i, n + i] = gamma
+    return J
+
+
+@njit(cache=True, fastmath=True)
+def _rk4(rhs_kernel, y0, beta, gamma, indptr, indices, data, N, dt, nsteps, out):
+    """
+    Fixed-step RK4 integration of the packed coupled SIR system, evaluating the
+    derivatives with rhs_kernel (rhs_into or rhs_into_parallel).
+    Writes the state at every step into out, of shape (nsteps + 1, 3 * num_patches).
+    Stage buffers are allocated once and reused across steps.
+    """
+    m = y0.shape[0]
+    work = np.empty(2 * N.shape[0])
+    k1 = np.empty(m)
+    k2 = np.empty(m)
+    k3 = np.empty(m)
+    k4 = np.empty(m)
+    tmp = np.empty(m)
+    out[0] = y0
+    for step in range(nsteps):
+        y = out[step]
+        rhs_kernel(y, beta, gamma, indptr, indices, data, N, work, k1)
+        for j in range(m):
+            tmp[j] = y[j] + 0.5 * dt * k1[j]
+        rhs_kernel(tmp, beta, gamma, indptr, indices, data, N, work, k2)
+        for j in range(m):
+            tmp[j] = y[j] + 0.5 * dt * k2[j]
+        rhs_kernel(tmp, beta, gamma, indptr, indices, data, N, work, k3)
+        for j in range(m):
+            tmp[j] = y[j] + dt * k3[j]
+        rhs_kernel(tmp, beta, gamma, indptr, indices, data, N, work, k4)
+        for j in range(m):
+            out[step + 1, j] = y[j] + dt / 6.0 * (k1[j] + 2.0 * k2[j] + 2.0 * k3[j] + k4[j])
+    return out
+
+
+def warmup():
+    """
+    Compile the kernels for the argument types used below on a one-patch,
+    one-step problem, so the real run starts from compiled code (or loads it
+    from the on-disk cache).
+    """
+    y0 = np.array([1.0, 0.0, 0.0])
+    W = sparse.csr_matrix((1, 1))
+    csr = (W.indptr, W.indices, W.data, np.ones(1))
+    _rk4(rhs_into, y0, 0.1, 0.1, *csr, 1.0, 1, np.empty((2, 3)))
+    rhs(0.0, y0, 0.1, 0.1, *csr)
+    jac(0.0, y0, 0.1, 0.1, *csr)
+
+
+warmup()
+
+
 # Load config
 with open('configs/sample-sir-ode.yaml') as f:
     config = yaml.safe_load(f)
@@ -17,40 +170,49 @@ patches = patch_df['patch'].tolist()
 populations = patch_df.set_index('patch')['Population'].to_dict()
 
 # Check populations are positive
-for p, pop in populations.items():
-    assert pop > 0, f"Population for patch {p} must be positive"
+nonpositive = patch_df.loc[patch_df['Population'].to_numpy() <= 0, 'patch']
+assert nonpositive.empty, f"Population for patch {nonpositive.iloc[0]} must be positive"
 
 # Read seeds
 seed_df = pd.read_csv(config['SeedFile'])
 
 # Check seeds are non-negative and do not exceed population
-for _, row in seed_df.iterrows():
-    patch = row['patch']
-    total = row['S'] + row['I'] + row['R']
-    assert all(row[c] >= 0 for c in ['S', 'I', 'R']), f"Seed values must be non-negative for patch {patch}"
-    assert abs(total - populations[patch]) < 1e-6, f"Seed values do not sum to population for patch {patch}"
+seed_values = seed_df[['S', 'I', 'R']]
+negative = seed_df.loc[(seed_values < 0).any(axis=1), 'patch']
+assert negative.empty, f"Seed values must be non-negative for patch {negative.iloc[0]}"
+mismatch = ~np.isclose(seed_values.sum(axis=1), seed_df['patch'].map(populations), rtol=0, atol=1e-6)
+assert not mismatch.any(), f"Seed values do not sum to population for patch {seed_df.loc[mismatch, 'patch'].iloc[0]}"
 
 # Read network matrix (static, day 0)
 net_df = pd.read_csv(config['NetworkFile'])
 net_df = net_df[net_df['day'] == 0]
-patch_idx = {p: i for i, p in enumerate(patches)}
 num_patches = len(patches)
-network_matrix = np.zeros((num_patches, num_patches))
-for _, row in net_df.iterrows():
-    i = patch_idx[row['source'].strip('"')]
-    j = patch_idx[row['target'].strip('"')]
-    assert row['weight'] >= 0, f"Network weight must be non-negative between {row['source']} and {row['target']}"
-    network_matrix[i, j] = row['weight']
+weights = net_df['weight'].to_numpy(dtype=float)
+negative = net_df[weights < 0]
+assert negative.empty, f"Network weight must be non-negative between {negative['source'].iloc[0]} and {negative['target'].iloc[0]}"
+network_matrix = build_network_matrix(
+    {
+        'source': net_df['source'].str.strip('"').to_numpy(),
+        'target': net_df['target'].str.strip('"').to_numpy(),
+        'weight': weights,
+    },
+    patches,
+)
 
 # SIR parameters
 beta = config['Beta']
 gamma = config['Gamma']
 
-# Initial conditions
-y0 = {}
-for _, row in seed_df.iterrows():
-    for c in ['S', 'I', 'R']:
-        y0[f"{c}_{patch_idx[row['patch']]}" ] = row[c]
+# Initial conditions: one indexed lookup per compartment, in patch order, written
+# straight into the packed state y0 = [S_0..S_P-1, I_0..I_P-1, R_0..R_P-1].
+# Patches without a seed row start fully susceptible.
+seeds = seed_df.set_index('patch').reindex(patches)
+y0 = np.empty(3 * num_patches)
+S0, I0, R0 = y0[:num_patches], y0[num_patches:2 * num_patches], y0[2 * num_patches:]
+for c, block in zip(['S', 'I', 'R'], (S0, I0, R0)):
+    block[:] = seeds[c].fillna(0).to_numpy(dtype=float)
+unseeded = seeds['S'].isna().to_numpy()
+S0[unseeded] = patch_df['Population'].to_numpy(dtype=float)[unseeded]
 
 # Model setup
 base = CompartmentalModel(
@@ -76,15 +238,37 @@ for subdir in ['plots', 'runs']:
 plots_dir = os.path.join(config['OutputDir'], 'plots')
 runs_dir = os.path.join(config['OutputDir'], 'runs')
 
-_, out_ode = net.simulate_ode(y0, t_range, odeint)
+# Integrate all patches, by default with the compiled fixed-step RK4 (one step per
+# output time); set Solver: LSODA for stiff parameter sets.
+N = S0 + I0 + R0
+W = net.network
+args = (float(beta), float(gamma), W.indptr, W.indices, W.data, N)
+solver = config.get('Solver', 'RK4')
+if solver not in ('RK4', 'LSODA'):
+    raise ValueError(f"Unknown Solver '{solver}'; expected 'RK4' or 'LSODA'.")
+if len(t_range) == 1:
+    out = y0[np.newaxis].copy()  # TMax: 1 has no steps to take
+elif solver == 'LSODA':
+    # Population-scale tolerances by default. atol stays well below one individual
+    # because epidemics start from a few seeds and coupling amplifies early absolute error.
+    rtol = float(config.get('Tolerance', 1e-4))
+    atol = float(config.get('AbsTolerance', 1e-4))
+    sol = solve_ivp(rhs, (t_range[0], t_range[-1]), y0, method='LSODA',
+                    t_eval=t_range, args=args, jac=jac, rtol=rtol, atol=atol)
+    out = sol.y.T
+else:
+    out = np.empty((len(t_range), 3 * num_patches))
+    parallel = num_patches >= PARALLEL_MIN_PATCHES and get_num_threads() > 1
+    rhs_kernel = rhs_into_parallel if parallel else rhs_into
+    _rk4(rhs_kernel, y0, *args, float(t_range[1] - t_range[0]), len(t_range) - 1, out)
+out_ode = out.reshape(len(t_range), 3, num_patches)  # (T, compartment, patch)
 
-out_df = pd.DataFrame(out_ode)
-out_df['time'] = t_range
-cols = ['time'] + [c for c in out_df.columns if c != 'time']
-out_df = out_df[cols]
+# CSV keeps one column per patch compartment, in NetworkModel's cached column order
+out_df = pd.DataFrame(out_ode.transpose(0, 2, 1).reshape(len(t_range), -1), columns=net.all_compartments)
+out_df.insert(0, 'time', t_range)
 csv_path = os.path.join(runs_dir, f"all_patches_{model_name}_ode.csv")
 out_df.to_csv(csv_path, index=False)
-logger.info(f"Saved simulation output to {csv_path}")
+logger.info("Saved simulation output to %s", csv_path)
 
-plot_patch_subplots(t_range, out_ode, patches, plots_dir, model_name)
-logger.info(f"Saved all patch subplots to {plots_dir}/patch_timeseries_{model_name}_ode.png")
\ No newline at end of file
+plot_patch_subplots(t_range, out_ode, patches, plots_dir, model_name, base.compartments)
+logger.info("Saved all patch subplots to %s/patch_timeseries_%s_ode.png", plots_dir, model_name)
\ No newline at end of file
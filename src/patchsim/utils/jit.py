@@ -0,0 +1,30 @@
+"""
+Optional Numba support.
+
+Numba is an optional dependency (``pip install patchsim[jit]``). When it is not
+installed, ``njit`` degrades to a no-op decorator and ``prange`` to ``range`` so
+compiled kernels still run as plain Python/NumPy code, and ``get_num_threads``
+reports a single thread.
+"""
+try:
+    from numba import get_num_threads, njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """
+        Fallback for ``numba.njit`` that returns the function unchanged.
+        Supports both ``@njit`` and ``@njit(cache=True, ...)`` usage.
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    def get_num_threads():
+        """
+        Fallback for ``numba.get_num_threads``: plain Python runs on one thread.
+        """
+        return 1
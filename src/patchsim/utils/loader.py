@@ -1,7 +1,8 @@
 import yaml
-import csv
 import numpy as np
+import pandas as pd
 import random
+from scipy import sparse
 from datetime import datetime
 from patchsim.utils.logger import setup_logger
 from typing import List, Dict
@@ -22,14 +23,14 @@ def read_config(config_path: str) -> Dict[str, str]:
     try:
         with open(config_path, 'r') as f:
             config = yaml.safe_load(f)
-            logger.info(f"Configuration file '{config_path}' read successfully.")
+            logger.info("Configuration file '%s' read successfully.", config_path)
             return config
     except Exception as e:
-        logger.error(f"Failed to read configuration file '{config_path}': {e}")
+        logger.error("Failed to read configuration file '%s': %s", config_path, e)
         raise
 
 
-def read_patch_population(file_path: str) -> List[Dict[str, int]]:
+def read_patch_population(file_path: str) -> Dict[str, np.ndarray]:
     """
     Read and parse patch population data from a CSV file.
 
@@ -37,25 +38,27 @@ def read_patch_population(file_path: str) -> List[Dict[str, int]]:
         file_path (str): Path to the CSV file.
 
     Returns:
-        list: List of patches with population data.
+        dict: Columnar patch data with arrays "region", "N0", "I0" and "S0", plus a
+        0-d "seeded_through" date used by apply_seeding_infections (NaT until seeded).
     """
-    patches = []
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                patches.append({
-                    "region": row["region"],
-                    "N0": int(row["population"])
-                })
-        logger.info(f"Patch population file '{file_path}' read successfully.")
+        df = pd.read_csv(file_path, dtype={"region": str})
+        n0 = df["population"].to_numpy(np.int64)
+        patches = {
+            "region": df["region"].to_numpy(),
+            "N0": n0,
+            "I0": np.zeros_like(n0),
+            "S0": n0.copy(),
+            "seeded_through": np.array("NaT", dtype="datetime64[ns]"),
+        }
+        logger.info("Patch population file '%s' read successfully.", file_path)
     except Exception as e:
-        logger.error(f"Failed to read patch population file '{file_path}': {e}")
+        logger.error("Failed to read patch population file '%s': %s", file_path, e)
         raise
     return patches
 
 
-def read_network(file_path: str) -> List[Dict[str, float]]:
+def read_network(file_path: str) -> Dict[str, np.ndarray]:
     """
     Read and parse the network file for patch connectivity.
 
@@ -63,31 +66,71 @@ def read_network(file_path: str) -> List[Dict[str, float]]:
         file_path (str): Path to the network CSV file.
 
     Returns:
-        list: List of edges with weights.
+        dict: Columnar edge list with arrays "source", "target" and "weight".
     """
-    network = []
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if "source" not in row or "target" not in row or "weight" not in row:
-                    logger.warning(f"Invalid format in network file '{file_path}'.")
-                    continue
-                network.append({
-                    "source": row["source"],
-                    "target": row["target"],
-                    "weight": float(row["weight"]),
-                })
-        logger.info(f"Network file '{file_path}' read successfully.")
+        df = pd.read_csv(file_path, dtype={"source": str, "target": str})
+        if not {"source", "target", "weight"}.issubset(df.columns):
+            logger.warning("Invalid format in network file '%s'.", file_path)
+            df = pd.DataFrame({"source": [], "target": [], "weight": []})
+        invalid = df[["source", "target", "weight"]].isna().any(axis=1)
+        if invalid.any():
+            logger.warning("Skipped %d incomplete row(s) in network file '%s'.", invalid.sum(), file_path)
+            df = df[~invalid]
+        network = {
+            "source": df["source"].to_numpy(),
+            "target": df["target"].to_numpy(),
+            "weight": df["weight"].to_numpy(np.float64),
+        }
+        logger.info("Network file '%s' read successfully.", file_path)
     except Exception as e:
-        logger.error(f"Failed to read network file '{file_path}': {e}")
+        logger.error("Failed to read network file '%s': %s", file_path, e)
         raise
     return network
 
 
+def build_network_matrix(
+    network: Dict[str, np.ndarray], regions: List[str]
+) -> sparse.csr_matrix:
+    """
+    Build a sparse contact matrix from a network edge list.
+
+    Args:
+        network (dict): Columnar edge list with source, target and weight, as returned by read_network.
+        regions (list): Region names; their order defines the matrix row/column indices.
+
+    Returns:
+        scipy.sparse.csr_matrix: Matrix of shape (len(regions), len(regions)) with
+        entry [source, target] set to the edge weight.
+    """
+    region_index = pd.Index(regions)
+    rows = region_index.get_indexer(network["source"])
+    cols = region_index.get_indexer(network["target"])
+    unknown = np.flatnonzero((rows < 0) | (cols < 0))
+    if unknown.size:
+        k = unknown[0]
+        raise KeyError(
+            f"Network edge {network['source'][k]} -> {network['target'][k]} references a region missing from the patch list."
+        )
+    n = len(regions)
+    # csr_matrix sums repeated (source, target) entries, so reject them instead
+    keys = rows * n + cols
+    _, first = np.unique(keys, return_index=True)
+    if first.size != keys.size:
+        k = np.setdiff1d(np.arange(keys.size), first)[0]
+        raise ValueError(
+            f"Network edge {network['source'][k]} -> {network['target'][k]} is listed more than once."
+        )
+    matrix = sparse.csr_matrix(
+        (network["weight"], (rows, cols)), shape=(n, n), dtype=np.float64
+    )
+    logger.info("Network matrix built with %d edges across %d regions.", matrix.nnz, n)
+    return matrix
+
+
 def read_seeding_infection(
     file_path: str, *, start_date: datetime, end_date: datetime
-) -> List[Dict[str, str]]:
+) -> Dict[str, np.ndarray]:
     """
     Read and parse the seeding infection data.
 
@@ -97,53 +140,68 @@ def read_seeding_infection(
         end_date (datetime): End date from the configuration.
 
     Returns:
-        list: List of seeding infection data with patch, date, and seed count.
+        dict: Columnar seeding data with arrays "region", "date" and "seed_count",
+        sorted by date.
     """
-    seeds = []
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                seed_date = datetime.strptime(row["date"], "%Y-%m-%d")
-                if seed_date < start_date or seed_date > end_date:
-                    logger.warning(
-                        f"Seeding date {seed_date} for region {row['region']} is outside the simulation period ({start_date} to {end_date})."
-                    )
-                seeds.append({
-                    "region": row["region"],
-                    "date": seed_date,
-                    "seed_count": int(row["seed_count"]),
-                })
-        logger.info(f"Seeding infection file '{file_path}' read successfully.")
+        df = pd.read_csv(file_path, dtype={"region": str})
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", cache=True)
+        df = df.sort_values("date", kind="stable")
+        outside = df[~((df["date"] >= start_date) & (df["date"] <= end_date))]
+        if not outside.empty:
+            logger.warning(
+                "%d seeding date(s) are outside the simulation period (%s to %s): %s",
+                len(outside), start_date, end_date,
+                ", ".join(f"{r} on {d:%Y-%m-%d}" for r, d in zip(outside["region"], outside["date"])),
+            )
+        seeds = {
+            "region": df["region"].to_numpy(),
+            "date": df["date"].to_numpy(),
+            "seed_count": df["seed_count"].to_numpy(np.int64),
+        }
+        logger.info("Seeding infection file '%s' read successfully.", file_path)
     except Exception as e:
-        logger.error(f"Failed to read seeding infection file '{file_path}': {e}")
+        logger.error("Failed to read seeding infection file '%s': %s", file_path, e)
         raise
     return seeds
 
 
 def apply_seeding_infections(
-    patches: List[Dict[str, int]], seeds: List[Dict[str, str]], *, current_date: datetime
-) -> List[Dict[str, int]]:
+    patches: Dict[str, np.ndarray], seeds: Dict[str, np.ndarray], *, current_date: datetime
+) -> Dict[str, np.ndarray]:
     """
     Apply seeding infections to patches based on the current date.
 
+    Seeds are applied once each: patches["seeded_through"] records the latest
+    date already seeded into this patch set, so repeated calls with an advancing
+    date only scan newly activated seeds. The seeds themselves are not modified
+    and can be reused for other patch sets.
+
     Args:
-        patches (list): List of patches with population data.
-        seeds (list): List of seeding infection data with patch, date, and seed count.
+        patches (dict): Columnar patch data as returned by read_patch_population.
+        seeds (dict): Date-sorted seeding data as returned by read_seeding_infection.
         current_date (datetime): The current date for the simulation.
 
     Returns:
-        list: Updated patches with seeding infections applied.
+        dict: Updated patches with seeding infections applied.
     """
-    for seed in seeds:
-        if seed["date"] <= current_date:  # Only apply seeds for dates up to the current date
-            for patch in patches:
-                if patch["region"] == seed["region"]:
-                    # Cap infections at the total population
-                    seed_count = min(seed["seed_count"], patch["N0"] - patch.get("I0", 0))
-                    patch["I0"] = patch.get("I0", 0) + seed_count
-                    patch["S0"] = max(0, patch["N0"] - patch["I0"])  # Update susceptibles
-    logger.info(f"Seeding infections applied for date {current_date}.")
+    n0, i0, s0 = patches["N0"], patches["I0"], patches["S0"]
+    seeded_through = patches.setdefault("seeded_through", np.array("NaT", dtype="datetime64[ns]"))
+    current = np.datetime64(current_date, "ns")
+    dates = seeds["date"]
+    start = 0 if np.isnat(seeded_through) else int(np.searchsorted(dates, seeded_through, side="right"))
+    # Only apply seeds for dates up to the current date
+    stop = int(np.searchsorted(dates, current, side="right"))
+    if stop > start:
+        rows = pd.Index(patches["region"]).get_indexer(seeds["region"][start:stop])
+        for i, seed_count in zip(rows, seeds["seed_count"][start:stop]):
+            if i < 0:
+                continue
+            # Cap infections at the total population
+            i0[i] += min(seed_count, n0[i] - i0[i])
+            s0[i] = max(0, n0[i] - i0[i])  # Update susceptibles
+        seeded_through[...] = dates[stop - 1]
+    logger.info("Seeding infections applied for date %s.", current_date)
     return patches
 
 
@@ -156,4 +214,4 @@ def set_random_seed(*, seed: int) -> None:
     """
     np.random.seed(seed)
     random.seed(seed)
-    logger.info(f"Random seed set to {seed}.")
\ No newline at end of file
+    logger.info("Random seed set to %s.", seed)
\ No newline at end of file
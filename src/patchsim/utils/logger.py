@@ -4,46 +4,61 @@ import platform
 import sys
 from datetime import datetime
 
-def setup_logger(model_name, config, num_patches, patches, base_model):
+def setup_logger(model_name=None, config=None, num_patches=None, patches=None, base_model=None):
     """
-    Set up a logger to log messages to a file and the console, and log system/run details.
+    Set up a logger to log messages to a run log file, and log system/run details.
+
+    The logger is a module-wide singleton. Called without a config (e.g. at
+    import time) it just returns the shared logger. Called with a config it
+    attaches a run log file under config['OutputDir']/logs, reusing the existing
+    handler when one already writes to that directory, and logs the run details.
     Args:
-        model_name (str): Name of the model.
-        config (dict): Configuration dictionary.
-        num_patches (int): Number of patches.
-        patches (list): List of patch names.
-        base_model (CompartmentalModel): Base model object.
+        model_name (str, optional): Name of the model.
+        config (dict, optional): Configuration dictionary.
+        num_patches (int, optional): Number of patches.
+        patches (list, optional): List of patch names.
+        base_model (CompartmentalModel, optional): Base model object.
     Returns:
         logging.Logger: Configured logger.
     """
-    log_dir = os.path.join(config['OutputDir'], "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, f"{model_name}_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
     logger = logging.getLogger("PatchSimLogger")
     logger.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    fh = logging.FileHandler(log_file)
-    fh.setFormatter(formatter)
-    logger.handlers = []
-    logger.addHandler(fh)
+    if config is None:
+        return logger
+    log_dir = os.path.abspath(os.path.join(config['OutputDir'], "logs"))
+    file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+    if not any(os.path.dirname(h.baseFilename) == log_dir for h in file_handlers):
+        for h in file_handlers:
+            logger.removeHandler(h)
+            h.close()
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, f"{model_name}_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        fh = logging.FileHandler(log_file)
+        fh.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(fh)
     # Log system and run details
-    logger.info(f"Model: {model_name}")
-    logger.info(f"Python version: {sys.version}")
-    logger.info(f"Platform: {platform.platform()}")
-    logger.info(f"Parameters: {base_model.parameters}")
-    # Parameter agnostic positivity check
-    for param, value in base_model.parameters.items():
-        try:
-            if float(value) <= 0:
-                logger.warning(f"Parameter '{param}' has non-positive value: {value}")
-        except Exception:
-            logger.warning(f"Parameter '{param}' could not be checked for positivity (value: {value})")
-    logger.info(f"PatchFile: {config['PatchFile']}")
-    logger.info(f"SeedFile: {config['SeedFile']}")
-    logger.info(f"NetworkFile: {config['NetworkFile']}")
-    logger.info(f"OutputDir: {config['OutputDir']}")
-    logger.info(f"TMax: {config['TMax']}")
-    logger.info(f"Num patches: {num_patches}")
-    logger.info(f"Patch list: {patches}")
-    logger.info(f"Base model: compartments={base_model.compartments}, transitions={base_model.transitions}, parameters={base_model.parameters}")
-    return logger
\ No newline at end of file
+    logger.info("Model: %s", model_name)
+    logger.info("Python version: %s", sys.version)
+    logger.info("Platform: %s", platform.platform())
+    if base_model is not None:
+        logger.info("Parameters: %s", base_model.parameters)
+        # Parameter agnostic positivity check
+        for param, value in base_model.parameters.items():
+            try:
+                if float(value) <= 0:
+                    logger.warning("Parameter '%s' has non-positive value: %s", param, value)
+            except Exception:
+                logger.warning("Parameter '%s' could not be checked for positivity (value: %s)", param, value)
+    logger.info("PatchFile: %s", config['PatchFile'])
+    logger.info("SeedFile: %s", config['SeedFile'])
+    logger.info("NetworkFile: %s", config['NetworkFile'])
+    logger.info("OutputDir: %s", config['OutputDir'])
+    logger.info("TMax: %s", config['TMax'])
+    logger.info("Num patches: %s", num_patches)
+    logger.info("Patch list: %s", patches)
+    if base_model is not None:
+        logger.info(
+            "Base model: compartments=%s, transitions=%s, parameters=%s",
+            base_model.compartments, base_model.transitions, base_model.parameters,
+        )
+    return logger
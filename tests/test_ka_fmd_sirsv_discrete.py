@@ -0,0 +1,39 @@
+import importlib
+
+import numpy as np
+import pytest
+
+sirsv = importlib.import_module("patchsim.models.ka-fmd-sirsv-discrete")
+
+PARAMS = dict(
+    beta=0.125, gamma=0.0714, vax_rate=0.002,
+    weibull_shape_vax=3, weibull_scale_vax=200,
+    weibull_shape_rec=3, weibull_scale_rec=600,
+    days=300, seed_rate=1, vax_period=120, vax_duration=30, start_vax_day=10,
+    S0=2000, I0=10, R0=50, V0=300,
+)
+N = PARAMS["S0"] + PARAMS["I0"] + PARAMS["R0"] + PARAMS["V0"]
+
+
+@pytest.mark.parametrize("targeted", [False, True])
+def test_batch_xp_numpy_conserves_population_and_vaccine_buffer(targeted):
+    """The array-module (GPU) path, run with xp = numpy."""
+    (S, I, R, V, vax_len), args = sirsv._prepare_batch(PARAMS, 4, targeted, random_seed=7)
+    sirsv._sirsv_batch_xp(np, S, I, R, V, vax_len, *args)
+
+    np.testing.assert_allclose(S + I + R + V, N)
+    assert np.array_equal(vax_len, V.astype(np.int64))
+    assert (S >= 0).all() and (I >= 0).all() and (R >= 0).all() and (V >= 0).all()
+    # Vaccination rounds actually ran
+    assert V[:, -1].max() > 0
+
+
+@pytest.mark.parametrize("targeted", [False, True])
+def test_batch_xp_numpy_is_deterministic_for_a_seed(targeted):
+    runs = []
+    for _ in range(2):
+        (S, I, R, V, vax_len), args = sirsv._prepare_batch(PARAMS, 2, targeted, random_seed=3)
+        sirsv._sirsv_batch_xp(np, S, I, R, V, vax_len, *args)
+        runs.append((S, I, R, V))
+    for a, b in zip(*runs):
+        np.testing.assert_array_equal(a, b)
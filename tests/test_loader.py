@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from patchsim.utils import loader
+
+
+@pytest.fixture
+def patch_file(tmp_path):
+    path = tmp_path / "patches.csv"
+    path.write_text("region,population\nA,100\nB,50\nC,20\n")
+    return str(path)
+
+
+@pytest.fixture
+def seeds(tmp_path):
+    path = tmp_path / "seeds.csv"
+    path.write_text(
+        "region,date,seed_count\n"
+        "B,2020-01-05,10\n"
+        "A,2020-01-01,5\n"
+        "Z,2020-01-02,7\n"
+        "C,2020-01-03,15\n"
+        "C,2020-01-04,15\n"
+    )
+    return loader.read_seeding_infection(
+        str(path), start_date=datetime(2020, 1, 1), end_date=datetime(2020, 12, 31)
+    )
+
+
+def test_repeated_calls_with_the_same_date_apply_seeds_once(patch_file, seeds):
+    patches = loader.read_patch_population(patch_file)
+    for _ in range(3):
+        loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 1))
+    np.testing.assert_array_equal(patches["I0"], [5, 0, 0])
+    np.testing.assert_array_equal(patches["S0"], [95, 50, 20])
+
+    loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 5))
+    loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 5))
+    np.testing.assert_array_equal(patches["I0"], [5, 10, 20])
+
+
+def test_fresh_patch_set_reuses_the_same_seeds(patch_file, seeds):
+    before = {k: v.copy() for k, v in seeds.items()}
+    for _ in range(2):
+        patches = loader.read_patch_population(patch_file)
+        loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 10))
+        np.testing.assert_array_equal(patches["I0"], [5, 10, 20])
+    assert seeds.keys() == before.keys()
+    for k in seeds:
+        np.testing.assert_array_equal(seeds[k], before[k])
+
+
+def test_seeds_for_unknown_regions_are_skipped(patch_file, seeds):
+    patches = loader.read_patch_population(patch_file)
+    loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 2))
+    np.testing.assert_array_equal(patches["I0"], [5, 0, 0])
+    np.testing.assert_array_equal(patches["S0"], patches["N0"] - patches["I0"])
+
+
+def test_infections_are_capped_at_the_patch_population(patch_file, seeds):
+    patches = loader.read_patch_population(patch_file)
+    loader.apply_seeding_infections(patches, seeds, current_date=datetime(2020, 1, 4))
+    # C has N0 = 20: the first seed adds 15, the second only the remaining 5
+    assert patches["I0"][2] == 20
+    assert patches["S0"][2] == 0
+
+
+def network(source, target, weight):
+    return {
+        "source": np.array(source, dtype=object),
+        "target": np.array(target, dtype=object),
+        "weight": np.array(weight, dtype=float),
+    }
+
+
+def test_build_network_matrix_places_edges_by_region_order():
+    W = loader.build_network_matrix(network(["A", "B"], ["B", "A"], [0.5, 0.2]), ["B", "A"])
+    np.testing.assert_array_equal(W.toarray(), [[0.0, 0.2], [0.5, 0.0]])
+
+
+def test_build_network_matrix_rejects_unknown_regions():
+    with pytest.raises(KeyError, match="A -> Z"):
+        loader.build_network_matrix(network(["A"], ["Z"], [0.5]), ["A", "B"])
+
+
+def test_build_network_matrix_rejects_duplicate_edges():
+    with pytest.raises(ValueError, match="A -> B"):
+        loader.build_network_matrix(network(["A", "A"], ["B", "B"], [0.5, 0.2]), ["A", "B"])
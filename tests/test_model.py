@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from patchsim.core.model import CompartmentalModel, NetworkModel
+
+
+def sir_model():
+    return CompartmentalModel(
+        compartments=["S", "I", "R"],
+        parameters={"beta": 0.3, "gamma": 0.1},
+        transitions=[
+            {"from": "S", "to": "I", "rate": "beta * S * lambda_i"},
+            {"from": "I", "to": "R", "rate": "gamma * I"},
+        ],
+    )
+
+
+def network_rhs(net, y):
+    Y = y.reshape(net.num_patches, -1)
+    return net.base_model.compute_rates_batch(Y, net.compute_force_of_infection(Y)).ravel()
+
+
+@pytest.mark.parametrize("as_sparse", [False, True])
+def test_ode_jacobian_matches_finite_differences(as_sparse):
+    rng = np.random.default_rng(0)
+    P = 6
+    W = sparse.random(P, P, density=0.4, random_state=1, format="csr") + sparse.eye(P)
+    net = NetworkModel(sir_model(), P, W if as_sparse else W.toarray())
+    y = rng.random(3 * P) * 100 + 1
+
+    eps = 1e-5
+    J_fd = np.column_stack([
+        (network_rhs(net, y + eps * e) - network_rhs(net, y - eps * e)) / (2 * eps)
+        for e in np.eye(3 * P)
+    ])
+
+    J = net.ode_jacobian(y, 0.0)
+    np.testing.assert_allclose(J, J_fd, rtol=0, atol=1e-7)
+    np.testing.assert_allclose(net.ode_jacobian_sparse(y, 0.0).toarray(), J)
+
+
+def test_scalar_only_rates_fall_back_to_per_patch_evaluation():
+    base = CompartmentalModel(
+        compartments=["S", "I", "R"],
+        parameters={"beta": 0.3},
+        transitions=[
+            {"from": "S", "to": "I", "rate": "beta * S * lambda_i"},
+            {"from": "I", "to": "R", "rate": "max(I - 1, 0) * 0.1"},
+        ],
+    )
+    net = NetworkModel(base, 3, np.eye(3) * 0.5)
+    states = np.array([[90.0, 5.0, 5.0], [100.0, 0.0, 3.0], [50.0, 1.5, 0.0]])
+    lambdas = net.compute_force_of_infection(states)
+
+    expected = np.array([
+        base.compute_transition_rates(dict(zip(base.compartments, row)), {"lambda_i": lam})
+        for row, lam in zip(states, lambdas)
+    ])
+    np.testing.assert_allclose(base.compute_rates_batch(states, lambdas), expected)
+
+    _, history = net.simulate_discrete(states, range(3))
+    np.testing.assert_allclose(history[1], np.maximum(states + expected, 0))
+
+
+@pytest.mark.parametrize("rate, expected", [
+    ("g * I", 0.1),          # arithmetic only: complex step
+    ("g * abs(I)", 0.1),     # non-analytic: finite differences
+    ("max(g * I, 0)", 0.1),  # min/max reject complex input: finite differences
+])
+def test_rate_jacobian_handles_non_analytic_rates(rate, expected):
+    base = CompartmentalModel(
+        compartments=["S", "I", "R"],
+        parameters={"beta": 0.3, "g": 0.1},
+        transitions=[
+            {"from": "S", "to": "I", "rate": "beta * S * lambda_i"},
+            {"from": "I", "to": "R", "rate": rate},
+        ],
+    )
+    states = np.array([[90.0, 5.0, 5.0], [100.0, 2.0, 3.0]])
+    d_states, d_lambda = base.rate_jacobian_batch(states, np.array([0.2, 0.4]))
+
+    np.testing.assert_allclose(d_states[:, 1, 1], expected, rtol=1e-7)
+    np.testing.assert_allclose(d_states[:, 0, 0], 0.3 * np.array([0.2, 0.4]), rtol=1e-7)
+    np.testing.assert_allclose(d_lambda[:, 0], 0.3 * states[:, 0], rtol=1e-7)
+
+
+def test_rate_namespace_is_rebuilt_on_every_call():
+    base = sir_model()
+    state = {"S": 9.0, "I": 1.0, "R": 0.0}
+
+    np.testing.assert_allclose(
+        base.compute_transition_rates(state, {"lambda_i": 1.0}), [-2.7, 2.6, 0.1]
+    )
+
+    # Parameter edits after construction take effect
+    base.parameters["beta"] = 0.0
+    np.testing.assert_allclose(
+        base.compute_transition_rates(state, {"lambda_i": 1.0}), [0.0, -0.1, 0.1]
+    )
+
+    # lambda_i from an earlier call does not carry over, in either path
+    with pytest.raises(NameError):
+        base.compute_transition_rates(state)
+    base.compute_rates_batch(np.array([[9.0, 1.0, 0.0]]), np.array([1.0]))
+    with pytest.raises(NameError):
+        base.compute_rates_batch(np.array([[9.0, 1.0, 0.0]]))